@@ -0,0 +1,673 @@
+#!/usr/bin/env python3
+"""
+Async ABAC API Client for Python
+
+This sample client mirrors client.py but is built on httpx, so callers
+can issue independent requests concurrently (e.g. with asyncio.gather)
+instead of paying one network round trip at a time. When the server
+negotiates HTTP/2, concurrent requests are multiplexed over a single
+TCP+TLS connection; otherwise httpx falls back to HTTP/1.1 keep-alive.
+
+Requirements:
+    pip install 'httpx[http2]'
+    pip install msgspec  # optional, fastest JSON encode/decode
+    pip install orjson   # optional fallback, still beats stdlib json
+"""
+
+import asyncio
+import base64
+import json
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from typing import AsyncIterator, Optional, Dict, Any, List
+
+import httpx
+
+from client import AuthenticationError, APIError, _TTLCache, _json_dumps, _json_loads
+
+try:
+    import h2  # noqa: F401 -- presence enables HTTP/2 negotiation
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+
+class AsyncABACClient:
+    """Async client for interacting with the ABAC API.
+
+    Use as an async context manager so the underlying httpx client is
+    created and closed deterministically:
+
+        async with AsyncABACClient() as client:
+            await client.login_with_password("admin", "admin123")
+            users = await client.get_users()
+    """
+
+    def __init__(
+        self,
+        api_base_url: str = "http://localhost:3000",
+        keycloak_url: str = "http://localhost:8080",
+        realm: str = "abac-realm",
+        client_id: str = "abac-webapp",
+        client_secret: str = "abac-webapp-secret-change-in-production"
+    ):
+        self.api_base_url = api_base_url.rstrip('/')
+        self.keycloak_url = keycloak_url.rstrip('/')
+        self.realm = realm
+        self.client_id = client_id
+        self.client_secret = client_secret
+        # Constant per instance; computed once instead of re-formatting
+        # on every login/refresh
+        self._token_endpoint = f"{self.keycloak_url}/realms/{self.realm}/protocol/openid-connect/token"
+
+        self.access_token: Optional[str] = None
+        self.refresh_token: Optional[str] = None
+        self.token_expiry: Optional[datetime] = None
+        self._expiry_monotonic: float = 0.0
+
+        # Created lazily in __aenter__ so the client can be constructed
+        # outside a running event loop
+        self._session: Optional[httpx.AsyncClient] = None
+
+        # Single-flight guard so concurrent coroutines near expiry don't
+        # fire parallel refresh calls (Keycloak rejects replayed
+        # rotating refresh tokens)
+        self._refresh_lock = asyncio.Lock()
+
+        # Short-lived entity caches so tight loops re-reading the same
+        # user/resource/policy skip the round trip; invalidated by the
+        # matching mutation methods
+        self._user_cache = _TTLCache()
+        self._resource_cache = _TTLCache()
+        self._policy_cache = _TTLCache()
+
+        # Hot-path endpoints precomputed once: bound partials skip the
+        # wrapper frame for the no-argument listings (shadowing the class
+        # methods of the same name), and compiled URL templates replace
+        # per-call f-string formatting in the entity getters
+        self.get_users = partial(self._request, "GET", "/api/users")
+        self.get_resources = partial(self._request, "GET", "/api/resources")
+        self.get_policies = partial(self._request, "GET", "/api/policies")
+        self.get_audit_stats = partial(self._request, "GET", "/api/access/audit/stats")
+        self.get_token_info = partial(self._request, "GET", "/api/token-info")
+        self._user_url = "/api/users/{}".format
+        self._resource_url = "/api/resources/{}".format
+        self._policy_url = "/api/policies/{}".format
+
+        # In-flight GETs keyed by (path, params, parse) so concurrent
+        # duplicates share one round trip instead of racing
+        self._inflight: Dict[Any, "asyncio.Task"] = {}
+
+        # Timer for the proactive background refresh, and the task it
+        # spawns once it fires
+        self._refresh_handle: Optional[asyncio.TimerHandle] = None
+        self._refresh_task: Optional["asyncio.Task"] = None
+
+    async def __aenter__(self) -> "AsyncABACClient":
+        self._session = httpx.AsyncClient(
+            http2=_HTTP2,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                # keep idle connections past typical NAT timeouts so warm
+                # calls skip the reconnect handshake
+                keepalive_expiry=75
+            ),
+            timeout=httpx.Timeout(10.0),
+            headers={"Content-Type": "application/json"}
+        )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._refresh_handle is not None:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        if self._session:
+            await self._session.aclose()
+            self._session = None
+
+    @property
+    def token_endpoint(self) -> str:
+        return self._token_endpoint
+
+    async def login_with_password(self, username: str, password: str) -> Dict[str, Any]:
+        """
+        Authenticate with username and password (Resource Owner Password Grant)
+        """
+        data = {
+            "grant_type": "password",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "username": username,
+            "password": password
+        }
+
+        response = await self._session.post(
+            self.token_endpoint,
+            data=data,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        tokens = _json_loads(response.content)
+
+        if response.is_error:
+            raise AuthenticationError(
+                f"Authentication failed: {tokens.get('error_description', tokens.get('error'))}"
+            )
+
+        self._store_tokens(tokens)
+        return tokens
+
+    async def login_with_client_credentials(self) -> Dict[str, Any]:
+        """
+        Authenticate with client credentials (for service accounts)
+        """
+        data = {
+            "grant_type": "client_credentials",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret
+        }
+
+        response = await self._session.post(
+            self.token_endpoint,
+            data=data,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        tokens = _json_loads(response.content)
+
+        if response.is_error:
+            raise AuthenticationError(
+                f"Authentication failed: {tokens.get('error_description', tokens.get('error'))}"
+            )
+
+        self._store_tokens(tokens)
+        return tokens
+
+    async def refresh_access_token(self) -> Dict[str, Any]:
+        """
+        Refresh the access token using the refresh token
+        """
+        if not self.refresh_token:
+            raise AuthenticationError("No refresh token available")
+
+        data = {
+            "grant_type": "refresh_token",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "refresh_token": self.refresh_token
+        }
+
+        response = await self._session.post(
+            self.token_endpoint,
+            data=data,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        tokens = _json_loads(response.content)
+
+        if response.is_error:
+            raise AuthenticationError(
+                f"Token refresh failed: {tokens.get('error_description', tokens.get('error'))}"
+            )
+
+        self._store_tokens(tokens)
+        return tokens
+
+    @staticmethod
+    def _token_exp(token: str) -> Optional[datetime]:
+        """Read the exp claim from a JWT body without verifying the signature"""
+        try:
+            payload = token.split('.')[1]
+            payload += '=' * (-len(payload) % 4)
+            claims = json.loads(base64.urlsafe_b64decode(payload))
+            return datetime.utcfromtimestamp(claims['exp'])
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None
+
+    def _store_tokens(self, tokens: Dict[str, Any]):
+        """Store token data from response"""
+        self.access_token = tokens.get("access_token")
+        self.refresh_token = tokens.get("refresh_token")
+        # Prefer the issuer's exp claim over local clock + expires_in,
+        # which drifts against Keycloak and causes premature or late
+        # refresh round trips
+        self.token_expiry = self._token_exp(self.access_token) if self.access_token else None
+        if self.token_expiry is None:
+            expires_in = tokens.get("expires_in", 300)
+            self.token_expiry = datetime.utcnow() + timedelta(seconds=expires_in)
+        # Monotonic deadline (with the 5 s skew folded in) so the per-call
+        # expiry check is a single float compare, immune to NTP steps
+        remaining = (self.token_expiry - datetime.utcnow()).total_seconds()
+        self._expiry_monotonic = time.monotonic() + remaining - 5
+        # Refresh ahead of expiry off the request path so no caller pays
+        # the refresh round trip
+        if self.refresh_token:
+            self._schedule_refresh(remaining)
+        # Persist the bearer on the session so _request doesn't rebuild
+        # a headers dict on every call
+        if self._session is not None:
+            self._session.headers["Authorization"] = f"Bearer {self.access_token}"
+
+    def _schedule_refresh(self, remaining: float) -> None:
+        """Arm a background refresh ~60 s before the token expires"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop yet (constructed outside async context); the
+            # on-demand path in _ensure_authenticated still covers us
+            return
+        if self._refresh_handle is not None:
+            self._refresh_handle.cancel()
+        delay = remaining - 60
+        if delay <= 0:
+            # Short-lived token (hardened realms use 60 s lifetimes):
+            # refresh at half-life instead of re-arming a ~1 s timer and
+            # hammering the token endpoint
+            delay = remaining / 2
+        if delay <= 0:
+            # Already expired; leave it to the on-demand path
+            return
+        self._refresh_handle = loop.call_later(delay, self._spawn_background_refresh)
+
+    def _spawn_background_refresh(self) -> None:
+        """Timer callback: run the refresh as a tracked, cancellable task"""
+        self._refresh_task = asyncio.ensure_future(self._refresh_in_background())
+
+    async def _refresh_in_background(self) -> None:
+        """Refresh proactively, backing off on transient Keycloak failures"""
+        for attempt in range(3):
+            try:
+                async with self._refresh_lock:
+                    await self.refresh_access_token()
+                return
+            except Exception:
+                await asyncio.sleep(2 ** attempt)
+        # Give up quietly; _ensure_authenticated refreshes on demand
+
+    def _needs_refresh(self) -> bool:
+        """Whether the access token is at or near the issuer's expiry"""
+        return time.monotonic() >= self._expiry_monotonic
+
+    async def _ensure_authenticated(self):
+        """Ensure we have a valid access token, refreshing if necessary"""
+        if not self.access_token:
+            raise AuthenticationError("Not authenticated. Call login_with_password() or login_with_client_credentials() first.")
+
+        # Refresh shortly before the issuer considers the token expired
+        if self._needs_refresh():
+            async with self._refresh_lock:
+                # Re-check: another coroutine may have refreshed while we waited
+                if self._needs_refresh():
+                    if self.refresh_token:
+                        await self.refresh_access_token()
+                    else:
+                        raise AuthenticationError("Token expired and no refresh token available")
+
+    async def _request(self, method: str, path: str, json: Any = None,
+                       params: Optional[Dict[str, Any]] = None,
+                       parse: bool = True) -> Optional[Dict[str, Any]]:
+        """Make an authenticated API request.
+
+        Pass parse=False for endpoints whose success body the caller
+        discards; this skips the JSON decode entirely. Identical GETs
+        issued while one is already in flight are coalesced onto the
+        same round trip.
+        """
+        if method != "GET":
+            return await self._do_request(method, path, json, params, parse)
+
+        key = (path, tuple(sorted(params.items())) if params else None, parse)
+        entry = self._inflight.get(key)
+        if entry is None:
+            # [task, waiter count] -- the count decides who may cancel it
+            entry = [
+                asyncio.ensure_future(self._do_request(method, path, json, params, parse)),
+                0
+            ]
+            self._inflight[key] = entry
+
+        task = entry[0]
+        entry[1] += 1
+        try:
+            # Shield so one cancelled caller (or a wait_for timeout) does
+            # not tear down the shared round trip under its neighbors
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Cancel the underlying request only when we were its last waiter
+            if entry[1] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._inflight.pop(key, None)
+
+    async def _do_request(self, method: str, path: str, json: Any = None,
+                          params: Optional[Dict[str, Any]] = None,
+                          parse: bool = True) -> Optional[Dict[str, Any]]:
+        """Perform one authenticated round trip (no coalescing)"""
+        await self._ensure_authenticated()
+
+        url = f"{self.api_base_url}{path}"
+        # Serialize once with the fast encoder instead of letting httpx
+        # run the payload through stdlib json; Content-Type is already the
+        # session default
+        body = _json_dumps(json) if json is not None else None
+        response = await self._session.request(method, url, content=body, params=params)
+        if not response.is_error:
+            if not parse or not response.content:
+                return None
+            return _json_loads(response.content)
+
+        # Error path: parse defensively and cap pathological bodies
+        try:
+            data = _json_loads(response.content)
+            message = data.get('message', data.get('error'))
+        except (ValueError, AttributeError):
+            data = {"error": response.text[:512]}
+            message = data["error"]
+        raise APIError(
+            f"API request failed: {message}",
+            status_code=response.status_code,
+            response=data
+        )
+
+    # User Management
+    async def get_users(self) -> List[Dict[str, Any]]:
+        """List all users"""
+        return await self._request("GET", "/api/users")
+
+    async def get_user(self, user_id: str) -> Dict[str, Any]:
+        """Get a specific user (cached briefly)"""
+        user = self._user_cache.get(user_id)
+        if user is None:
+            user = await self._request("GET", self._user_url(user_id))
+            self._user_cache.set(user_id, user)
+        return user
+
+    async def create_user(self, username: str, email: str, display_name: Optional[str] = None) -> Dict[str, Any]:
+        """Create a new user"""
+        return await self._request("POST", "/api/users", {
+            "username": username,
+            "email": email,
+            "display_name": display_name or username
+        })
+
+    async def update_user(self, user_id: str, **kwargs) -> Dict[str, Any]:
+        """Update a user"""
+        self._user_cache.pop(user_id)
+        return await self._request("PUT", f"/api/users/{user_id}", kwargs)
+
+    async def delete_user(self, user_id: str) -> None:
+        """Delete a user"""
+        self._user_cache.pop(user_id)
+        return await self._request("DELETE", f"/api/users/{user_id}", parse=False)
+
+    async def set_user_attribute(self, user_id: str, attr_name: str, attr_value: str) -> Dict[str, Any]:
+        """Set a user attribute"""
+        self._user_cache.pop(user_id)
+        return await self._request("PUT", f"/api/users/{user_id}/attributes/{attr_name}", {
+            "value": attr_value
+        })
+
+    async def delete_user_attribute(self, user_id: str, attr_name: str) -> None:
+        """Delete a user attribute"""
+        self._user_cache.pop(user_id)
+        return await self._request("DELETE", f"/api/users/{user_id}/attributes/{attr_name}", parse=False)
+
+    # Resource Management
+    async def get_resources(self) -> List[Dict[str, Any]]:
+        """List all resources"""
+        return await self._request("GET", "/api/resources")
+
+    async def get_resource(self, resource_id: str) -> Dict[str, Any]:
+        """Get a specific resource (cached briefly)"""
+        resource = self._resource_cache.get(resource_id)
+        if resource is None:
+            resource = await self._request("GET", self._resource_url(resource_id))
+            self._resource_cache.set(resource_id, resource)
+        return resource
+
+    async def create_resource(self, name: str, resource_type: str, description: Optional[str] = None) -> Dict[str, Any]:
+        """Create a new resource"""
+        return await self._request("POST", "/api/resources", {
+            "name": name,
+            "type": resource_type,
+            "description": description
+        })
+
+    async def delete_resource(self, resource_id: str) -> None:
+        """Delete a resource"""
+        self._resource_cache.pop(resource_id)
+        return await self._request("DELETE", f"/api/resources/{resource_id}", parse=False)
+
+    async def set_resource_attribute(self, resource_id: str, attr_name: str, attr_value: str) -> Dict[str, Any]:
+        """Set a resource attribute"""
+        self._resource_cache.pop(resource_id)
+        return await self._request("PUT", f"/api/resources/{resource_id}/attributes/{attr_name}", {
+            "value": attr_value
+        })
+
+    # Policy Management
+    async def get_policies(self) -> List[Dict[str, Any]]:
+        """List all policies"""
+        return await self._request("GET", "/api/policies")
+
+    async def get_policy(self, policy_id: str) -> Dict[str, Any]:
+        """Get a specific policy (cached briefly)"""
+        policy = self._policy_cache.get(policy_id)
+        if policy is None:
+            policy = await self._request("GET", self._policy_url(policy_id))
+            self._policy_cache.set(policy_id, policy)
+        return policy
+
+    async def create_policy(self, name: str, effect: str, description: Optional[str] = None, priority: int = 0) -> Dict[str, Any]:
+        """Create a new policy"""
+        return await self._request("POST", "/api/policies", {
+            "name": name,
+            "effect": effect,
+            "description": description,
+            "priority": priority
+        })
+
+    async def delete_policy(self, policy_id: str) -> None:
+        """Delete a policy"""
+        self._policy_cache.pop(policy_id)
+        return await self._request("DELETE", f"/api/policies/{policy_id}", parse=False)
+
+    async def add_policy_condition(self, policy_id: str, subject_type: str, attribute_name: str,
+                                   operator: str, value: str) -> Dict[str, Any]:
+        """Add a condition to a policy"""
+        self._policy_cache.pop(policy_id)
+        return await self._request("POST", f"/api/policies/{policy_id}/conditions", {
+            "subject_type": subject_type,
+            "attribute_name": attribute_name,
+            "operator": operator,
+            "value": value
+        })
+
+    async def toggle_policy(self, policy_id: str) -> Dict[str, Any]:
+        """Toggle policy active status"""
+        self._policy_cache.pop(policy_id)
+        return await self._request("PATCH", f"/api/policies/{policy_id}/toggle")
+
+    # Access Control
+    async def check_access(self, user_id: str, resource_id: str, action: str,
+                           environment: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Check access without logging"""
+        return await self._request("POST", "/api/access/check", {
+            "user_id": user_id,
+            "resource_id": resource_id,
+            "action": action,
+            "environment": environment or {}
+        })
+
+    async def evaluate_access(self, user_id: str, resource_id: str, action: str,
+                              environment: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Evaluate access with logging"""
+        return await self._request("POST", "/api/access/evaluate", {
+            "user_id": user_id,
+            "resource_id": resource_id,
+            "action": action,
+            "environment": environment or {}
+        })
+
+    async def batch_check_access(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Check access for multiple requests"""
+        return await self._request("POST", "/api/access/batch-check", {"requests": requests})
+
+    async def batch_check_access_parallel(self, requests: List[Dict[str, Any]],
+                                          max_concurrency: int = 32) -> List[Any]:
+        """Check access for multiple requests via concurrent check_access calls.
+
+        Unlike batch_check_access, which posts one server-side batch, this
+        fans out one /api/access/check call per request with asyncio.gather,
+        so each request can carry its own environment and the wall time is
+        bounded by the slowest single call rather than the sum. Prefer the
+        server-side batch when all requests share one environment; use this
+        when per-request environment variance matters or the batch endpoint
+        is unavailable.
+
+        Results are returned in input order. Failed checks are returned as
+        exception instances rather than raised, so one denial of service
+        does not lose the rest of the batch.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def check_one(request: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.check_access(**request)
+
+        return await asyncio.gather(
+            *(check_one(request) for request in requests),
+            return_exceptions=True
+        )
+
+    async def get_permissions(self, user_id: str, resource_id: str) -> Dict[str, Any]:
+        """Get all permissions for a user on a resource"""
+        return await self._request("GET", f"/api/access/permissions/{user_id}/{resource_id}")
+
+    # Audit
+    async def get_audit_log(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Get audit log entries"""
+        return await self._request("GET", "/api/access/audit", params={"limit": limit, "offset": offset})
+
+    async def iter_audit_log(self, page_size: int = 500) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Iterate over audit log pages, prefetching the next page.
+
+        The fetch of page k+1 overlaps the caller's processing of page k,
+        and peak memory stays proportional to page_size instead of
+        buffering the entire log in one response. Iteration stops after
+        the first short page.
+        """
+        offset = 0
+        page = await self.get_audit_log(limit=page_size, offset=offset)
+        while page:
+            next_task = None
+            if len(page) == page_size:
+                next_task = asyncio.create_task(
+                    self.get_audit_log(limit=page_size, offset=offset + page_size)
+                )
+            try:
+                yield page
+            except BaseException:
+                # Consumer broke out of (or raised inside) its loop body;
+                # cancel the prefetch so it isn't orphaned mid-flight
+                if next_task is not None:
+                    next_task.cancel()
+                raise
+            if next_task is None:
+                return
+            offset += page_size
+            page = await next_task
+
+    async def get_audit_stats(self) -> Dict[str, Any]:
+        """Get audit statistics"""
+        return await self._request("GET", "/api/access/audit/stats")
+
+    async def clear_audit_log(self) -> None:
+        """Clear audit log"""
+        return await self._request("DELETE", "/api/access/audit", parse=False)
+
+    # Token Info
+    async def get_token_info(self) -> Dict[str, Any]:
+        """Get information about the current token"""
+        return await self._request("GET", "/api/token-info")
+
+
+async def main():
+    """Demo script showing async client usage"""
+    print("=== ABAC API Async Python Client Demo ===\n")
+
+    async with AsyncABACClient(
+        api_base_url="http://localhost:3000",
+        keycloak_url="http://localhost:8080",
+        realm="abac-realm",
+        client_id="abac-webapp",
+        client_secret="abac-webapp-secret-change-in-production"
+    ) as client:
+        try:
+            # Login as admin
+            print("1. Logging in as admin...")
+            await client.login_with_password("admin", "admin123")
+            print("   Login successful!\n")
+
+            # Token info, users and resources don't depend on each other,
+            # so fetch them concurrently: three round trips for the price
+            # of the slowest one
+            token_info, users, resources = await asyncio.gather(
+                client.get_token_info(),
+                client.get_users(),
+                client.get_resources()
+            )
+
+            # Get token info
+            print("2. Getting token info...")
+            print(f"   User: {token_info['user'].get('preferred_username')}")
+            print(f"   Realm roles: {', '.join(token_info['roles']['realm'])}")
+            print(f"   Client roles: {', '.join(token_info['roles']['client'])}\n")
+
+            # List users
+            print("3. Listing users...")
+            print(f"   Found {len(users)} users:")
+            for user in users[:3]:
+                print(f"   - {user['username']} ({user.get('email', 'N/A')})")
+            if len(users) > 3:
+                print(f"   ... and {len(users) - 3} more\n")
+
+            # List resources
+            print("4. Listing resources...")
+            print(f"   Found {len(resources)} resources:")
+            for resource in resources[:3]:
+                print(f"   - {resource['name']} ({resource.get('type', 'N/A')})")
+            if len(resources) > 3:
+                print(f"   ... and {len(resources) - 3} more\n")
+
+            # Check access
+            if users and resources:
+                print("5. Checking access...")
+                result = await client.check_access(
+                    user_id=users[0]['id'],
+                    resource_id=resources[0]['id'],
+                    action='read'
+                )
+                allowed = "CAN" if result['allowed'] else "CANNOT"
+                print(f"   User \"{users[0]['username']}\" {allowed} read \"{resources[0]['name']}\"")
+                print(f"   Decision: {result['decision']}\n")
+
+            print("=== Demo Complete ===")
+
+        except AuthenticationError as e:
+            print(f"Authentication error: {e}")
+        except APIError as e:
+            print(f"API error ({e.status_code}): {e}")
+            if e.response:
+                print(f"Response: {e.response}")
+        except Exception as e:
+            print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -7,12 +7,101 @@ and make authenticated requests to the ABAC API.
 
 Requirements:
     pip install requests
+    pip install msgspec  # optional, fastest JSON encode/decode
+    pip install orjson   # optional fallback, still beats stdlib json
 """
 
+import base64
+import json
+import socket
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
+from functools import partial
 from typing import Optional, Dict, Any, List
 
+# Fastest available JSON codec: msgspec beats orjson on decode (it skips
+# intermediate allocations), orjson beats the stdlib on both directions.
+# Both are optional so the samples still run with bare requests/httpx.
+try:
+    import msgspec.json
+
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def _json_dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj)
+
+    def _json_loads(buf: bytes) -> Any:
+        return _decoder.decode(buf)
+except ImportError:
+    try:
+        import orjson
+
+        def _json_dumps(obj: Any) -> bytes:
+            return orjson.dumps(obj)
+
+        def _json_loads(buf: bytes) -> Any:
+            return orjson.loads(buf)
+    except ImportError:
+        def _json_dumps(obj: Any) -> bytes:
+            return json.dumps(obj).encode("utf-8")
+
+        def _json_loads(buf: bytes) -> Any:
+            return json.loads(buf)
+
+
+class _TTLCache:
+    """Minimal TTL cache for entity lookups (avoids a cachetools dependency)"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: Dict[Any, Any] = {}  # key -> (deadline, value)
+
+    def get(self, key: Any) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        deadline, value = entry
+        if time.monotonic() >= deadline:
+            # pop, not del: two threads can race to expire the same entry
+            self._data.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: Any, value: Any) -> None:
+        if len(self._data) >= self.maxsize:
+            # Evict the oldest half; dicts preserve insertion order, and
+            # pop tolerates a concurrent expiry removing the same key
+            for stale in list(self._data)[:self.maxsize // 2]:
+                self._data.pop(stale, None)
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key: Any) -> None:
+        self._data.pop(key, None)
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter that enables TCP keepalive on pooled sockets.
+
+    NAT boxes and idle-connection reapers can silently drop pooled
+    connections; keepalive probes keep them warm (or detect the drop
+    early) so the next call doesn't pay a full reconnect handshake.
+    """
+
+    _socket_options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    if hasattr(socket, "TCP_KEEPIDLE"):  # Linux-only knob
+        _socket_options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60))
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = self._socket_options
+        super().init_poolmanager(*args, **kwargs)
+
 
 class ABACClient:
     """Client for interacting with the ABAC API"""
@@ -30,17 +119,70 @@ class ABACClient:
         self.realm = realm
         self.client_id = client_id
         self.client_secret = client_secret
+        # Constant per instance; computed once instead of re-formatting
+        # on every login/refresh
+        self._token_endpoint = f"{self.keycloak_url}/realms/{self.realm}/protocol/openid-connect/token"
         
         self.access_token: Optional[str] = None
         self.refresh_token: Optional[str] = None
         self.token_expiry: Optional[datetime] = None
+        self._expiry_monotonic: float = 0.0
         
-        # Session for connection pooling
+        # Session for connection pooling. The default adapter only keeps
+        # 10 connections; a larger pool plus retries on transient gateway
+        # errors avoids new TCP/TLS handshakes during bursts of calls.
         self.session = requests.Session()
+        adapter = _KeepAliveAdapter(
+            pool_connections=20,
+            pool_maxsize=100,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=(502, 503, 504)
+            )
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        # Single-flight guard so concurrent callers near expiry don't
+        # fire parallel refresh calls (Keycloak rejects replayed
+        # rotating refresh tokens)
+        self._refresh_lock = threading.Lock()
+
+        # Short-lived entity caches so tight loops re-reading the same
+        # user/resource/policy skip the round trip; invalidated by the
+        # matching mutation methods
+        self._user_cache = _TTLCache()
+        self._resource_cache = _TTLCache()
+        self._policy_cache = _TTLCache()
+
+        # Hot-path endpoints precomputed once: bound partials skip the
+        # wrapper frame for the no-argument listings (shadowing the class
+        # methods of the same name), and compiled URL templates replace
+        # per-call f-string formatting in the entity getters
+        self.get_users = partial(self._request, "GET", "/api/users")
+        self.get_resources = partial(self._request, "GET", "/api/resources")
+        self.get_policies = partial(self._request, "GET", "/api/policies")
+        self.get_audit_stats = partial(self._request, "GET", "/api/access/audit/stats")
+        self.get_token_info = partial(self._request, "GET", "/api/token-info")
+        self._user_url = "/api/users/{}".format
+        self._resource_url = "/api/resources/{}".format
+        self._policy_url = "/api/policies/{}".format
+
+    def __enter__(self) -> "ABACClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the session's pooled connections"""
+        self.session.close()
 
     @property
     def token_endpoint(self) -> str:
-        return f"{self.keycloak_url}/realms/{self.realm}/protocol/openid-connect/token"
+        return self._token_endpoint
 
     def login_with_password(self, username: str, password: str) -> Dict[str, Any]:
         """
@@ -54,7 +196,11 @@ class ABACClient:
             "password": password
         }
 
-        response = self.session.post(self.token_endpoint, data=data)
+        response = self.session.post(
+            self.token_endpoint,
+            data=data,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
         
         if not response.ok:
             error = response.json()
@@ -76,7 +222,11 @@ class ABACClient:
             "client_secret": self.client_secret
         }
 
-        response = self.session.post(self.token_endpoint, data=data)
+        response = self.session.post(
+            self.token_endpoint,
+            data=data,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
         
         if not response.ok:
             error = response.json()
@@ -102,7 +252,11 @@ class ABACClient:
             "refresh_token": self.refresh_token
         }
 
-        response = self.session.post(self.token_endpoint, data=data)
+        response = self.session.post(
+            self.token_endpoint,
+            data=data,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
         
         if not response.ok:
             error = response.json()
@@ -114,46 +268,88 @@ class ABACClient:
         self._store_tokens(tokens)
         return tokens
 
+    @staticmethod
+    def _token_exp(token: str) -> Optional[datetime]:
+        """Read the exp claim from a JWT body without verifying the signature"""
+        try:
+            payload = token.split('.')[1]
+            payload += '=' * (-len(payload) % 4)
+            claims = json.loads(base64.urlsafe_b64decode(payload))
+            return datetime.utcfromtimestamp(claims['exp'])
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None
+
     def _store_tokens(self, tokens: Dict[str, Any]):
         """Store token data from response"""
         self.access_token = tokens.get("access_token")
         self.refresh_token = tokens.get("refresh_token")
-        expires_in = tokens.get("expires_in", 300)
-        self.token_expiry = datetime.now() + timedelta(seconds=expires_in)
+        # Prefer the issuer's exp claim over local clock + expires_in,
+        # which drifts against Keycloak and causes premature or late
+        # refresh round trips
+        self.token_expiry = self._token_exp(self.access_token) if self.access_token else None
+        if self.token_expiry is None:
+            expires_in = tokens.get("expires_in", 300)
+            self.token_expiry = datetime.utcnow() + timedelta(seconds=expires_in)
+        # Monotonic deadline (with the 5 s skew folded in) so the per-call
+        # expiry check is a single float compare, immune to NTP steps
+        remaining = (self.token_expiry - datetime.utcnow()).total_seconds()
+        self._expiry_monotonic = time.monotonic() + remaining - 5
+        # Persist the bearer on the session so _request doesn't rebuild
+        # a headers dict on every call
+        self.session.headers["Authorization"] = f"Bearer {self.access_token}"
+
+    def _needs_refresh(self) -> bool:
+        """Whether the access token is at or near the issuer's expiry"""
+        return time.monotonic() >= self._expiry_monotonic
 
     def _ensure_authenticated(self):
         """Ensure we have a valid access token, refreshing if necessary"""
         if not self.access_token:
             raise AuthenticationError("Not authenticated. Call login_with_password() or login_with_client_credentials() first.")
-        
-        # Refresh token if it expires within 30 seconds
-        if self.token_expiry and datetime.now() >= self.token_expiry - timedelta(seconds=30):
-            if self.refresh_token:
-                self.refresh_access_token()
-            else:
-                raise AuthenticationError("Token expired and no refresh token available")
-
-    def _request(self, method: str, path: str, json: Any = None) -> Dict[str, Any]:
-        """Make an authenticated API request"""
+
+        # Refresh shortly before the issuer considers the token expired
+        if self._needs_refresh():
+            with self._refresh_lock:
+                # Re-check: another thread may have refreshed while we waited
+                if self._needs_refresh():
+                    if self.refresh_token:
+                        self.refresh_access_token()
+                    else:
+                        raise AuthenticationError("Token expired and no refresh token available")
+
+    def _request(self, method: str, path: str, json: Any = None,
+                 params: Optional[Dict[str, Any]] = None,
+                 parse: bool = True) -> Optional[Dict[str, Any]]:
+        """Make an authenticated API request.
+
+        Pass parse=False for endpoints whose success body the caller
+        discards; this skips the JSON decode entirely.
+        """
         self._ensure_authenticated()
         
         url = f"{self.api_base_url}{path}"
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-
-        response = self.session.request(method, url, headers=headers, json=json)
-        data = response.json()
-
-        if not response.ok:
-            raise APIError(
-                f"API request failed: {data.get('message', data.get('error'))}",
-                status_code=response.status_code,
-                response=data
-            )
-
-        return data
+        # Serialize once with the fast encoder instead of letting requests
+        # run the payload through stdlib json; Content-Type is already the
+        # session default
+        body = _json_dumps(json) if json is not None else None
+        response = self.session.request(method, url, data=body, params=params)
+        if response.ok:
+            if not parse or not response.content:
+                return None
+            return _json_loads(response.content)
+
+        # Error path: parse defensively and cap pathological bodies
+        try:
+            data = _json_loads(response.content)
+            message = data.get('message', data.get('error'))
+        except (ValueError, AttributeError):
+            data = {"error": response.text[:512]}
+            message = data["error"]
+        raise APIError(
+            f"API request failed: {message}",
+            status_code=response.status_code,
+            response=data
+        )
 
     # User Management
     def get_users(self) -> List[Dict[str, Any]]:
@@ -161,8 +357,12 @@ class ABACClient:
         return self._request("GET", "/api/users")
 
     def get_user(self, user_id: str) -> Dict[str, Any]:
-        """Get a specific user"""
-        return self._request("GET", f"/api/users/{user_id}")
+        """Get a specific user (cached briefly)"""
+        user = self._user_cache.get(user_id)
+        if user is None:
+            user = self._request("GET", self._user_url(user_id))
+            self._user_cache.set(user_id, user)
+        return user
 
     def create_user(self, username: str, email: str, display_name: Optional[str] = None) -> Dict[str, Any]:
         """Create a new user"""
@@ -174,21 +374,25 @@ class ABACClient:
 
     def update_user(self, user_id: str, **kwargs) -> Dict[str, Any]:
         """Update a user"""
+        self._user_cache.pop(user_id)
         return self._request("PUT", f"/api/users/{user_id}", kwargs)
 
-    def delete_user(self, user_id: str) -> Dict[str, Any]:
+    def delete_user(self, user_id: str) -> None:
         """Delete a user"""
-        return self._request("DELETE", f"/api/users/{user_id}")
+        self._user_cache.pop(user_id)
+        return self._request("DELETE", f"/api/users/{user_id}", parse=False)
 
     def set_user_attribute(self, user_id: str, attr_name: str, attr_value: str) -> Dict[str, Any]:
         """Set a user attribute"""
+        self._user_cache.pop(user_id)
         return self._request("PUT", f"/api/users/{user_id}/attributes/{attr_name}", {
             "value": attr_value
         })
 
-    def delete_user_attribute(self, user_id: str, attr_name: str) -> Dict[str, Any]:
+    def delete_user_attribute(self, user_id: str, attr_name: str) -> None:
         """Delete a user attribute"""
-        return self._request("DELETE", f"/api/users/{user_id}/attributes/{attr_name}")
+        self._user_cache.pop(user_id)
+        return self._request("DELETE", f"/api/users/{user_id}/attributes/{attr_name}", parse=False)
 
     # Resource Management
     def get_resources(self) -> List[Dict[str, Any]]:
@@ -196,8 +400,12 @@ class ABACClient:
         return self._request("GET", "/api/resources")
 
     def get_resource(self, resource_id: str) -> Dict[str, Any]:
-        """Get a specific resource"""
-        return self._request("GET", f"/api/resources/{resource_id}")
+        """Get a specific resource (cached briefly)"""
+        resource = self._resource_cache.get(resource_id)
+        if resource is None:
+            resource = self._request("GET", self._resource_url(resource_id))
+            self._resource_cache.set(resource_id, resource)
+        return resource
 
     def create_resource(self, name: str, resource_type: str, description: Optional[str] = None) -> Dict[str, Any]:
         """Create a new resource"""
@@ -207,12 +415,14 @@ class ABACClient:
             "description": description
         })
 
-    def delete_resource(self, resource_id: str) -> Dict[str, Any]:
+    def delete_resource(self, resource_id: str) -> None:
         """Delete a resource"""
-        return self._request("DELETE", f"/api/resources/{resource_id}")
+        self._resource_cache.pop(resource_id)
+        return self._request("DELETE", f"/api/resources/{resource_id}", parse=False)
 
     def set_resource_attribute(self, resource_id: str, attr_name: str, attr_value: str) -> Dict[str, Any]:
         """Set a resource attribute"""
+        self._resource_cache.pop(resource_id)
         return self._request("PUT", f"/api/resources/{resource_id}/attributes/{attr_name}", {
             "value": attr_value
         })
@@ -223,8 +433,12 @@ class ABACClient:
         return self._request("GET", "/api/policies")
 
     def get_policy(self, policy_id: str) -> Dict[str, Any]:
-        """Get a specific policy"""
-        return self._request("GET", f"/api/policies/{policy_id}")
+        """Get a specific policy (cached briefly)"""
+        policy = self._policy_cache.get(policy_id)
+        if policy is None:
+            policy = self._request("GET", self._policy_url(policy_id))
+            self._policy_cache.set(policy_id, policy)
+        return policy
 
     def create_policy(self, name: str, effect: str, description: Optional[str] = None, priority: int = 0) -> Dict[str, Any]:
         """Create a new policy"""
@@ -235,13 +449,15 @@ class ABACClient:
             "priority": priority
         })
 
-    def delete_policy(self, policy_id: str) -> Dict[str, Any]:
+    def delete_policy(self, policy_id: str) -> None:
         """Delete a policy"""
-        return self._request("DELETE", f"/api/policies/{policy_id}")
+        self._policy_cache.pop(policy_id)
+        return self._request("DELETE", f"/api/policies/{policy_id}", parse=False)
 
     def add_policy_condition(self, policy_id: str, subject_type: str, attribute_name: str, 
                             operator: str, value: str) -> Dict[str, Any]:
         """Add a condition to a policy"""
+        self._policy_cache.pop(policy_id)
         return self._request("POST", f"/api/policies/{policy_id}/conditions", {
             "subject_type": subject_type,
             "attribute_name": attribute_name,
@@ -251,6 +467,7 @@ class ABACClient:
 
     def toggle_policy(self, policy_id: str) -> Dict[str, Any]:
         """Toggle policy active status"""
+        self._policy_cache.pop(policy_id)
         return self._request("PATCH", f"/api/policies/{policy_id}/toggle")
 
     # Access Control
@@ -285,15 +502,15 @@ class ABACClient:
     # Audit
     def get_audit_log(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """Get audit log entries"""
-        return self._request("GET", f"/api/access/audit?limit={limit}&offset={offset}")
+        return self._request("GET", "/api/access/audit", params={"limit": limit, "offset": offset})
 
     def get_audit_stats(self) -> Dict[str, Any]:
         """Get audit statistics"""
         return self._request("GET", "/api/access/audit/stats")
 
-    def clear_audit_log(self) -> Dict[str, Any]:
+    def clear_audit_log(self) -> None:
         """Clear audit log"""
-        return self._request("DELETE", "/api/access/audit")
+        return self._request("DELETE", "/api/access/audit", parse=False)
 
     # Token Info
     def get_token_info(self) -> Dict[str, Any]:
@@ -323,67 +540,67 @@ def main():
     """Demo script showing client usage"""
     print("=== ABAC API Python Client Demo ===\n")
 
-    client = ABACClient(
+    with ABACClient(
         api_base_url="http://localhost:3000",
         keycloak_url="http://localhost:8080",
         realm="abac-realm",
         client_id="abac-webapp",
         client_secret="abac-webapp-secret-change-in-production"
-    )
-
-    try:
-        # Login as admin
-        print("1. Logging in as admin...")
-        client.login_with_password("admin", "admin123")
-        print("   Login successful!\n")
-
-        # Get token info
-        print("2. Getting token info...")
-        token_info = client.get_token_info()
-        print(f"   User: {token_info['user'].get('preferred_username')}")
-        print(f"   Realm roles: {', '.join(token_info['roles']['realm'])}")
-        print(f"   Client roles: {', '.join(token_info['roles']['client'])}\n")
-
-        # List users
-        print("3. Listing users...")
-        users = client.get_users()
-        print(f"   Found {len(users)} users:")
-        for user in users[:3]:
-            print(f"   - {user['username']} ({user.get('email', 'N/A')})")
-        if len(users) > 3:
-            print(f"   ... and {len(users) - 3} more\n")
-
-        # List resources
-        print("4. Listing resources...")
-        resources = client.get_resources()
-        print(f"   Found {len(resources)} resources:")
-        for resource in resources[:3]:
-            print(f"   - {resource['name']} ({resource.get('type', 'N/A')})")
-        if len(resources) > 3:
-            print(f"   ... and {len(resources) - 3} more\n")
-
-        # Check access
-        if users and resources:
-            print("5. Checking access...")
-            result = client.check_access(
-                user_id=users[0]['id'],
-                resource_id=resources[0]['id'],
-                action='read'
-            )
-            allowed = "CAN" if result['allowed'] else "CANNOT"
-            print(f"   User \"{users[0]['username']}\" {allowed} read \"{resources[0]['name']}\"")
-            print(f"   Decision: {result['decision']}\n")
-
-        print("=== Demo Complete ===")
-
-    except AuthenticationError as e:
-        print(f"Authentication error: {e}")
-    except APIError as e:
-        print(f"API error ({e.status_code}): {e}")
-        if e.response:
-            print(f"Response: {e.response}")
-    except Exception as e:
-        print(f"Error: {e}")
+    ) as client:
+
+        try:
+            # Login as admin
+            print("1. Logging in as admin...")
+            client.login_with_password("admin", "admin123")
+            print("   Login successful!\n")
+
+            # Get token info
+            print("2. Getting token info...")
+            token_info = client.get_token_info()
+            print(f"   User: {token_info['user'].get('preferred_username')}")
+            print(f"   Realm roles: {', '.join(token_info['roles']['realm'])}")
+            print(f"   Client roles: {', '.join(token_info['roles']['client'])}\n")
+
+            # List users
+            print("3. Listing users...")
+            users = client.get_users()
+            print(f"   Found {len(users)} users:")
+            for user in users[:3]:
+                print(f"   - {user['username']} ({user.get('email', 'N/A')})")
+            if len(users) > 3:
+                print(f"   ... and {len(users) - 3} more\n")
+
+            # List resources
+            print("4. Listing resources...")
+            resources = client.get_resources()
+            print(f"   Found {len(resources)} resources:")
+            for resource in resources[:3]:
+                print(f"   - {resource['name']} ({resource.get('type', 'N/A')})")
+            if len(resources) > 3:
+                print(f"   ... and {len(resources) - 3} more\n")
+
+            # Check access
+            if users and resources:
+                print("5. Checking access...")
+                result = client.check_access(
+                    user_id=users[0]['id'],
+                    resource_id=resources[0]['id'],
+                    action='read'
+                )
+                allowed = "CAN" if result['allowed'] else "CANNOT"
+                print(f"   User \"{users[0]['username']}\" {allowed} read \"{resources[0]['name']}\"")
+                print(f"   Decision: {result['decision']}\n")
+
+            print("=== Demo Complete ===")
+
+        except AuthenticationError as e:
+            print(f"Authentication error: {e}")
+        except APIError as e:
+            print(f"API error ({e.status_code}): {e}")
+            if e.response:
+                print(f"Response: {e.response}")
+        except Exception as e:
+            print(f"Error: {e}")
 
 
 if __name__ == "__main__":